@@ -1,10 +1,18 @@
+import os
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 import calendar
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pmdarima as pm
+from numba import njit
+from plotly_resampler import FigureResampler
+from statsforecast import StatsForecast
+from statsforecast.models import AutoARIMA
+
+month_order = list(calendar.month_name)[1:]
+age_cols = ['<20', '20-29', '30-39', '40+']
 
 # -----------------------
 # PAGE CONFIG
@@ -41,43 +49,102 @@ st.markdown('<div class="sub-heading">Explore trends in birth statistics by regi
 # -----------------------
 @st.cache_data
 def load_data():
-    df = pd.read_excel("monthly region data.xlsx")
-    df['year'] = df['year'].astype(int)
-    df['month'] = df['month'].astype(str)
-    return df
+    # One-shot conversion: openpyxl parses the XLSX serially, so do it once
+    # and serve every later load from a compact columnar Parquet file.
+    if not os.path.exists("births.parquet"):
+        df = pd.read_excel("monthly region data.xlsx")
+        df['year'] = df['year'].astype('int16')
+        df['month'] = pd.Categorical(df['month'].astype(str), categories=month_order, ordered=True)
+        df['region'] = df['region'].astype('category')
+        df[['birth_count'] + age_cols] = df[['birth_count'] + age_cols].astype('int32')
+        # Persist in (year, month, region) order: every downstream groupby on
+        # these keys then sees already-grouped runs instead of paying a sort.
+        df = df.sort_values(['year', 'month', 'region'], kind='stable').reset_index(drop=True)
+        df.to_parquet("births.parquet")
+    return pd.read_parquet("births.parquet")
 
 df = load_data()
 
+@st.cache_data
+def build_agg(df):
+    # One small (year, month, region) table feeds the KPIs and every chart,
+    # so reruns only ever touch the reduced frame instead of the raw rows.
+    return (df.groupby(['year', 'month', 'region'], observed=True, sort=False)
+              [['birth_count'] + age_cols].sum().reset_index())
+
+agg = build_agg(df)
+
 # -----------------------
 # SIDEBAR FILTERS
 # -----------------------
 st.sidebar.title("🎛️ Filters")
 
+# Category dtype keeps its categories lexically sorted, so this is the same
+# list sorted(unique()) produced without rescanning the frame per rerun.
+region_options = df['region'].cat.categories.tolist()
+
 year_range = st.sidebar.slider("Year Range", int(df['year'].min()), int(df['year'].max()),
                                (int(df['year'].min()), int(df['year'].max())))
 
-month_order = list(calendar.month_name)[1:]
 months = st.sidebar.multiselect("Months", month_order, default=month_order)
 
-regions = st.sidebar.multiselect("Regions", sorted(df['region'].unique()), default=sorted(df['region'].unique()))
+regions = st.sidebar.multiselect("Regions", region_options, default=region_options)
 
-age_cols = ['<20', '20-29', '30-39', '40+']
 selected_ages = st.sidebar.multiselect("Age Groups", age_cols, default=age_cols)
 
 # -----------------------
 # FILTER DATA
 # -----------------------
-filtered_df = df[(df['year'].between(year_range[0], year_range[1])) &
-                 (df['month'].isin(months)) &
-                 (df['region'].isin(regions))]
+# Filter via categorical codes: one boolean lookup table per widget, then a
+# single NumPy gather per column instead of hashing every string with isin.
+month_ok = np.zeros(len(agg['month'].cat.categories), dtype=bool)
+month_ok[[agg['month'].cat.categories.get_loc(m) for m in months]] = True
+region_ok = np.zeros(len(agg['region'].cat.categories), dtype=bool)
+region_ok[[agg['region'].cat.categories.get_loc(r) for r in regions]] = True
+
+mask = np.logical_and.reduce([
+    agg['year'].values >= year_range[0],
+    agg['year'].values <= year_range[1],
+    month_ok[agg['month'].cat.codes.values],
+    region_ok[agg['region'].cat.codes.values],
+])
+filtered_df = agg.iloc[np.flatnonzero(mask)]
+
+# Sort the filtered rows by year once; the yearly aggregations below then
+# reduce over contiguous segments instead of paying the groupby hash path.
+year_order = np.argsort(filtered_df['year'].values, kind='stable')
+uniq_years, year_starts = np.unique(filtered_df['year'].values[year_order], return_index=True)
 
 # -----------------------
 # KPIs
 # -----------------------
-total_births = filtered_df['birth_count'].sum()
-avg_births = filtered_df.groupby('region')['birth_count'].mean().mean()
-top_region = filtered_df.groupby('region')['birth_count'].sum().idxmax()
-dominant_age = filtered_df[selected_ages].sum().idxmax()
+@njit(cache=True)
+def kpi_kernel(birth, region_codes, ages, n_regions):
+    # One fused pass over the filtered columns instead of four separate
+    # pandas reductions (sum, two groupbys, column-wise sum).
+    total = 0
+    per_region = np.zeros(n_regions, np.int64)
+    region_rows = np.zeros(n_regions, np.int64)
+    age_tot = np.zeros(ages.shape[1], np.int64)
+    for i in range(birth.shape[0]):
+        total += birth[i]
+        per_region[region_codes[i]] += birth[i]
+        region_rows[region_codes[i]] += 1
+        for j in range(ages.shape[1]):
+            age_tot[j] += ages[i, j]
+    return total, per_region, region_rows, age_tot
+
+region_cats = agg['region'].cat.categories
+total_births, per_region, region_rows, age_tot = kpi_kernel(
+    filtered_df['birth_count'].values,
+    filtered_df['region'].cat.codes.values,
+    np.ascontiguousarray(filtered_df[selected_ages].values),
+    len(region_cats))
+
+seen = region_rows > 0
+avg_births = (per_region[seen] / region_rows[seen]).mean()
+top_region = region_cats[int(per_region.argmax())]
+dominant_age = selected_ages[int(age_tot.argmax())]
 
 st.markdown("### 🔢 Key Indicators")
 kpi1, kpi2, kpi3, kpi4 = st.columns(4)
@@ -94,18 +161,34 @@ st.markdown("---")
 st.subheader("📊 Overview Trends")
 col1, col2 = st.columns(2)
 
+# Chart builders are memoized on their (small) input frames: a rerun that
+# leaves a chart's data untouched reuses the prebuilt Figure instead of
+# paying the Plotly Express construction cost again.
+@st.cache_data
+def make_yearly_line(yearly):
+    return px.line(yearly, x='year', y='birth_count', markers=True,
+                   title="Yearly Birth Trend", template="simple_white", color_discrete_sequence=['#1f77b4'])
+
+@st.cache_data
+def make_monthly_bar(monthly_avg):
+    # Pre-format the labels once here instead of having Plotly's text_auto
+    # formatter run over every bar on the server and again in the browser.
+    text = ['' if pd.isna(v) else f'{v:,.0f}' for v in monthly_avg['birth_count']]
+    fig = px.bar(monthly_avg, x='month', y='birth_count', text=text,
+                 title="Average Births per Month",
+                 color='birth_count', color_continuous_scale='Blues')
+    fig.update_traces(texttemplate='%{text}')
+    return fig
+
 with col1:
-    yearly = filtered_df.groupby('year')['birth_count'].sum().reset_index()
-    fig_yearly = px.line(yearly, x='year', y='birth_count', markers=True,
-                         title="Yearly Birth Trend", template="simple_white", color_discrete_sequence=['#1f77b4'])
-    st.plotly_chart(fig_yearly, use_container_width=True)
+    yearly = pd.DataFrame({'year': uniq_years,
+                           'birth_count': np.add.reduceat(
+                               filtered_df['birth_count'].values[year_order], year_starts)})
+    st.plotly_chart(make_yearly_line(yearly), use_container_width=True)
 
 with col2:
-    monthly_avg = filtered_df.groupby('month')['birth_count'].mean().reindex(month_order).reset_index()
-    fig_monthly = px.bar(monthly_avg, x='month', y='birth_count', text_auto='.2s',
-                         title="Average Births per Month",
-                         color='birth_count', color_continuous_scale='Blues')
-    st.plotly_chart(fig_monthly, use_container_width=True)
+    monthly_avg = filtered_df.groupby('month', observed=True, sort=False)['birth_count'].mean().reindex(month_order).reset_index()
+    st.plotly_chart(make_monthly_bar(monthly_avg), use_container_width=True)
 
 # -----------------------
 # SECTION 2: DISTRIBUTIONS
@@ -113,46 +196,68 @@ with col2:
 st.subheader("🧬 Birth Distribution Insights")
 col3, col4 = st.columns(2)
 
+@st.cache_data
+def make_age_pie(age_dist):
+    return px.pie(age_dist, names='Age Group', values='Births', hole=0.45,
+                  title="By Age Group", color_discrete_sequence=px.colors.sequential.RdBu)
+
+@st.cache_data
+def make_region_pie(region_share):
+    return px.pie(region_share, names='region', values='birth_count', hole=0.45,
+                  title="By Region", color_discrete_sequence=px.colors.qualitative.Pastel)
+
 with col3:
     age_dist = filtered_df[selected_ages].sum().reset_index()
     age_dist.columns = ['Age Group', 'Births']
-    fig_age_pie = px.pie(age_dist, names='Age Group', values='Births', hole=0.45,
-                         title="By Age Group", color_discrete_sequence=px.colors.sequential.RdBu)
-    st.plotly_chart(fig_age_pie, use_container_width=True)
+    st.plotly_chart(make_age_pie(age_dist), use_container_width=True)
 
 with col4:
-    region_share = filtered_df.groupby('region')['birth_count'].sum().reset_index()
-    fig_region_pie = px.pie(region_share, names='region', values='birth_count', hole=0.45,
-                            title="By Region", color_discrete_sequence=px.colors.qualitative.Pastel)
-    st.plotly_chart(fig_region_pie, use_container_width=True)
+    region_share = filtered_df.groupby('region', observed=True, sort=False)['birth_count'].sum().reset_index()
+    st.plotly_chart(make_region_pie(region_share), use_container_width=True)
 
 # -----------------------
 # SECTION 3: TRENDS
 # -----------------------
 st.subheader("📈 Detailed Trends")
 
+# FigureResampler caps each trace at 500 shown samples (LTTB), so the browser
+# payload stays flat as the year range and region count grow.
+@st.cache_data
+def make_age_trend(age_trend, selected_ages):
+    return FigureResampler(px.area(age_trend, x='year', y=selected_ages,
+                                   title="Age Group Birth Trends Over Time",
+                                   template="simple_white"),
+                           default_n_shown_samples=500)
+
+@st.cache_data
+def make_region_trend(region_trend):
+    return FigureResampler(px.line(region_trend, x='year', y='birth_count', color='region',
+                                   title="Yearly Births by Region", template="plotly_white"),
+                           default_n_shown_samples=500)
+
 # Age trend over time
-age_trend = filtered_df.groupby('year')[selected_ages].sum().reset_index()
-fig_age_trend = px.area(age_trend, x='year', y=selected_ages,
-                        title="Age Group Birth Trends Over Time",
-                        template="simple_white")
-st.plotly_chart(fig_age_trend, use_container_width=True)
+age_trend = pd.DataFrame(
+    np.add.reduceat(np.ascontiguousarray(filtered_df[selected_ages].values)[year_order],
+                    year_starts, axis=0),
+    columns=selected_ages)
+age_trend.insert(0, 'year', uniq_years)
+st.plotly_chart(make_age_trend(age_trend, selected_ages), use_container_width=True)
 
 # Region trend line
-region_trend = filtered_df.groupby(['year', 'region'])['birth_count'].sum().reset_index()
-fig_region_trend = px.line(region_trend, x='year', y='birth_count', color='region',
-                           title="Yearly Births by Region", template="plotly_white")
-st.plotly_chart(fig_region_trend, use_container_width=True)
+region_trend = filtered_df.groupby(['year', 'region'], observed=True, sort=False)['birth_count'].sum().reset_index()
+st.plotly_chart(make_region_trend(region_trend), use_container_width=True)
 
 # -----------------------
 # SECTION 4: HEATMAP
 # -----------------------
 st.subheader("🔥 Monthly Births by Region Heatmap")
 
-heat_df = filtered_df.groupby(['region', 'month'])['birth_count'].mean().unstack().reindex(columns=month_order)
-fig, ax = plt.subplots(figsize=(12, 5))
-sns.heatmap(heat_df, cmap="YlOrRd", annot=True, fmt=".0f", linewidths=.5, ax=ax)
-st.pyplot(fig)
+heat_df = filtered_df.groupby(['region', 'month'], observed=True, sort=False)['birth_count'].mean().unstack().reindex(columns=month_order)
+fig_heat = go.Figure(go.Heatmap(z=heat_df.values.astype('float32'),
+                                x=heat_df.columns.tolist(), y=heat_df.index.tolist(),
+                                colorscale='YlOrRd', texttemplate='%{z:.0f}', xgap=1, ygap=1))
+fig_heat.update_layout(height=500, yaxis_autorange='reversed')
+st.plotly_chart(fig_heat, use_container_width=True)
 
 # -----------------------
 # SECTION 5: FORECASTING (SARIMA)
@@ -160,25 +265,43 @@ st.pyplot(fig)
 st.markdown("---")
 st.subheader("🔮 Forecasting Future Births")
 
+@st.cache_data
+def monthly_by_region(df):
+    # One wide month x region table for the whole app: each forecast pulls a
+    # single column instead of re-running the groupby/resample pipeline.
+    dates = pd.to_datetime({'year': df['year'], 'month': df['month'].cat.codes + 1, 'day': 1})
+    return (df.assign(date=dates)
+              .pivot_table(index='date', columns='region', values='birth_count',
+                           aggfunc='sum', observed=True)
+              .resample('MS').sum().fillna(0).astype('float32'))
+
+@st.cache_resource(show_spinner=False)
+def fit_forecaster(long_df):
+    # One batch fit covers every region (numba-jitted kernels, parallel over
+    # series); switching regions afterwards is a lookup into the shared
+    # predict output instead of a fresh per-region model search.
+    sf = StatsForecast(models=[AutoARIMA(season_length=12)], freq='MS', n_jobs=-1)
+    sf.fit(long_df)
+    return sf
+
 with st.expander("📈 Run Forecasting with SARIMA"):
-    forecast_region = st.selectbox("Select Region for Forecast", sorted(df['region'].unique()))
+    forecast_region = st.selectbox("Select Region for Forecast", region_options)
     forecast_months = st.slider("Forecast Months", 6, 36, 12)
 
-    region_df = df[df['region'] == forecast_region]
-    ts_df = region_df.groupby(['year', 'month'])['birth_count'].sum().reset_index()
-
-    # Convert to datetime and reindex by month
-    ts_df['date'] = pd.to_datetime(ts_df['year'].astype(str) + '-' + ts_df['month'], format='%Y-%B')
-    ts_df = ts_df.sort_values('date').set_index('date').resample('MS').sum()
-    ts_df['birth_count'] = ts_df['birth_count'].fillna(0)  # Fill NaNs
-
-    ts = ts_df['birth_count']
+    wide = monthly_by_region(df)
+    ts = wide[forecast_region]
 
-    with st.spinner("Training SARIMA model..."):
-        model = pm.auto_arima(ts, seasonal=True, m=12, stepwise=True, suppress_warnings=True)
+    long_df = (wide.reset_index()
+                   .melt(id_vars='date', var_name='unique_id', value_name='y')
+                   .rename(columns={'date': 'ds'}))
+    with st.spinner("Training SARIMA models..."):
+        sf = fit_forecaster(long_df)
 
-    forecast_values = model.predict(n_periods=forecast_months)
-    forecast_index = pd.date_range(ts.index[-1] + pd.offsets.MonthBegin(1), periods=forecast_months, freq='MS')
+    fcst = sf.predict(h=forecast_months, level=[95])
+    region_fcst = fcst[fcst['unique_id'] == forecast_region]
+    forecast_index = pd.DatetimeIndex(region_fcst['ds'])
+    forecast_values = region_fcst['AutoARIMA'].to_numpy()
+    conf_int = region_fcst[['AutoARIMA-lo-95', 'AutoARIMA-hi-95']].to_numpy()
     forecast_series = pd.Series(forecast_values, index=forecast_index)
 
     full_series = pd.concat([ts, forecast_series])
@@ -188,4 +311,15 @@ with st.expander("📈 Run Forecasting with SARIMA"):
                            template="plotly_white")
     fig_forecast.add_scatter(x=forecast_series.index, y=forecast_series,
                              mode='lines', name='Forecast', line=dict(dash='dot'))
-    st.plotly_chart(fig_forecast, use_container_width=True)
+    st.plotly_chart(FigureResampler(fig_forecast, default_n_shown_samples=500),
+                    use_container_width=True)
+
+    # Plain pre-rounded frame: st.dataframe ships an Arrow table directly,
+    # with no per-cell Styler formatting on the server.
+    forecast_display = pd.DataFrame({
+        'Date': forecast_index.strftime('%B %Y'),
+        'Forecast': forecast_values,
+        'Lower Bound': conf_int[:, 0],
+        'Upper Bound': conf_int[:, 1],
+    })
+    st.dataframe(forecast_display.set_index('Date').round().astype('int32'))